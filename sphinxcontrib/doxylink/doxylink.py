@@ -1,13 +1,16 @@
 import bisect
+import functools
+import hashlib
 import os
+import pickle
 import re
 import requests
 import shutil
+import sys
 import time
-import xml.etree.ElementTree as ET
 import urllib.parse
 from collections import namedtuple
-from typing import List, Optional, Union
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 from dateutil.parser import parse as parsedate
 from docutils import nodes, utils
@@ -17,13 +20,71 @@ from sphinx import __version__ as sphinx_version
 
 if sphinx_version >= '1.6.0':
     from sphinx.util.logging import getLogger
+else:
+    from logging import getLogger  # type: ignore
+
+logger = getLogger(__name__)
+
+# lxml parses tag files a lot faster when it is available
+try:
+    from lxml import etree as ET  # type: ignore
+    HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
 
 from . import __version__
 from .parsing import normalise, ParseException
 
 
+# Version of what is stored in the tag file cache (SymbolMap and its entries).
+# Bump it whenever that changes so that caches written by older code are
+# rebuilt, even when the extension version stays the same.
+CACHE_SCHEMA = 2
+
+# Matches identifiers, e.g. the ``bar`` at the end of ``foo::bar``
+_IDENTIFIER = re.compile(r'\w+')
+
+# Kinds of compounds that are turned into entries
+_COMPOUND_KINDS = frozenset({'namespace', 'class', 'struct', 'file', 'define', 'group', 'page'})
+
+# Kinds of members that can have an <arglist> but are not functions
+_NONFUNCTION_MEMBER_KINDS = frozenset({'variable', 'typedef', 'enumeration', 'enumvalue'})
+
+# Where a tag file can be read from: a path, a binary file object or an already parsed XML tree
+TagFileSource = Union[str, IO[bytes], ET.ElementTree, ET.Element]
+
+
+@functools.lru_cache(maxsize=None)
+def normalise_arglist(name: str, arglist: str) -> Optional[str]:
+    '''
+    Normalises the argument list of a function from a tag file. Most functions
+    are never referenced, so this is only done when an entry is first compared
+    against a reference with an argument list. Results are cached without a
+    bound, so a parse failure is only reported once.
+
+    Args:
+        name (str): qualified function name
+        arglist (str): argument list as found in the tag file
+
+    Returns:
+        str: the normalised argument list, or None if it could not be parsed
+    '''
+    try:
+        return sys.intern(normalise(name + arglist)[1])
+    except ParseException as e:
+        logger.warning(f'Ignoring the argument list of {name}{arglist}. Error reported from parser was: {e}')
+        return None
+
+
 class Entry(namedtuple('_Entry', ['name', 'kind', 'file', 'arglist'])):
-    '''Represents a documentation entry produced by Doxygen.'''
+    '''
+    Represents a documentation entry produced by Doxygen. For functions,
+    ``arglist`` holds the argument list as found in the tag file.
+    '''
+
+    # There are many entries, don't give each of them a __dict__
+    __slots__ = ()
 
     def matches(self, name: str, kind: Optional[str], arglist: Optional[str]) -> bool:
         '''
@@ -43,27 +104,32 @@ class Entry(namedtuple('_Entry', ['name', 'kind', 'file', 'arglist'])):
         if not self.name.endswith(name):
             return False
 
-        # "do_foo" doesn't match "foo"
-        prefix = self.name[:-len(name)]
-        if prefix and (prefix[-1].isidentifier() or prefix[-1].isnumeric()):
-            return False
+        # "do_foo" doesn't match "foo". Only the character before the match
+        # matters, so look at it directly rather than slicing off the prefix.
+        if name and len(self.name) > len(name):
+            boundary = self.name[-len(name) - 1]
+            if boundary.isidentifier() or boundary.isnumeric():
+                return False
 
         if not arglist:
             # If no argument list is provided, anything matches
             return True
 
-        return self.arglist == arglist
+        return self.normalised_arglist == arglist
 
 
-    def __lt__(self, other: Union["Entry", str]) -> bool:  # type:ignore
-        '''
-        Compares entries for sorting by reverse name. This allows `SymbolMap` to
-        match "foo::bar" when searching for "bar".
-        '''
+    @property
+    def normalised_arglist(self) -> Optional[str]:
+        '''Returns the normalised argument list, or None if there is none or it could not be parsed'''
+        if not self.arglist:
+            return None
+        return normalise_arglist(self.name, self.arglist)
 
-        if isinstance(other, Entry):
-            return self.name[::-1] < other.name[::-1]
-        return self.name[::-1] < other
+
+    @property
+    def has_unparsable_arglist(self) -> bool:
+        '''Returns true if this is a function whose argument list could not be parsed'''
+        return bool(self.arglist) and self.normalised_arglist is None
 
 
     @property
@@ -134,11 +200,31 @@ def is_url(str_to_validate: str) -> bool:
 
 class SymbolMap:
     """A SymbolMap maps symbols to Entries."""
-    def __init__(self, xml_doc: ET.ElementTree) -> None:
-        entries = parse_tag_file(xml_doc)
-
-        # Sort the entry list for use with bisect
-        self._entries = sorted(entries)
+    def __init__(self, source: TagFileSource) -> None:
+        entries = parse_tag_file(source)
+
+        # Sort the entry list by reversed name for use with bisect. Entries
+        # ending with the same string are then next to each other, which acts
+        # as a suffix index. The reversed names are kept in a parallel list so
+        # that bisect compares plain strings instead of reversing names at
+        # every step.
+        self._entries = sorted(entries, key=lambda entry: entry.name[::-1])
+        self._reversed_names = [sys.intern(entry.name[::-1]) for entry in self._entries]
+
+        # Index entries by their full name so that fully qualified lookups
+        # don't need to scan the list. The sorted order is preserved.
+        self._by_name: Dict[str, List[Entry]] = {}
+        for entry in self._entries:
+            self._by_name.setdefault(entry.name, []).append(entry)
+
+        # Index entries by the identifier their name ends with (``bar`` for
+        # ``foo::bar``). An unqualified reference can only match at an
+        # identifier boundary, so these are the only entries it can match.
+        self._by_basename: Dict[str, List[Entry]] = {}
+        for entry, reversed_name in zip(self._entries, self._reversed_names):
+            basename = _IDENTIFIER.match(reversed_name)
+            if basename:
+                self._by_basename.setdefault(basename.group()[::-1], []).append(entry)
 
 
     def _find_entries(self, name: str, kind: Optional[str], arglist: Optional[str]) -> List[Entry]:
@@ -154,16 +240,24 @@ class SymbolMap:
             list[Entry]: all entries whose name ends with 'name'
         '''
 
+        # Unqualified names are answered straight from the basename index
+        if _IDENTIFIER.fullmatch(name):
+            return [candidate for candidate in self._by_basename.get(name, ())
+                    if candidate.matches(name, kind, arglist)]
+
         matches = []
 
         # Thanks to the sorting, all we need to do is iterate from the first to
-        # the last matching entry.
-        start = bisect.bisect_left(self._entries, name[::-1])  # type:ignore
-        for candidate in self._entries[start:]:
-            if not candidate.name.endswith(name):
+        # the last matching entry. Walk by index rather than slicing so that
+        # the tail of the list isn't copied on every lookup.
+        reversed_name = name[::-1]
+        reversed_names = self._reversed_names
+        for index in range(bisect.bisect_left(reversed_names, reversed_name), len(reversed_names)):
+            if not reversed_names[index].startswith(reversed_name):
                 # Reached the end of entries that end in 'name'
                 break
 
+            candidate = self._entries[index]
             if candidate.matches(name, kind, arglist):
                 # Found one
                 matches.append(candidate)
@@ -187,30 +281,43 @@ class SymbolMap:
         if not candidates:
             raise LookupError(f'No documentation entry matching "{name}"')
 
+        # Functions whose argument list could not be parsed are only used as a
+        # last resort, so that they don't take the place of a better match
+        parsable = [c for c in candidates if not c.has_unparsable_arglist]
+        if parsable:
+            candidates = parsable
+
         # An exact match would appear at the beginning of the list.
         if len(candidates) == 1 or candidates[0].name == name:
             return candidates[0]
 
-        # If there is more than one candidate then there is an ambiguity
-        # Often this is due to the symbol matching the name of the constructor as well as the class name itself
-        # We will prefer the class
-        classes = [c for c in candidates if c.is_class]
+        # If there is more than one candidate then there is an ambiguity. The
+        # rules below are applied in order; gather what they need in one pass.
+        class_count = 0
+        first_class = None
+        no_template_count = 0
+        shortest_no_template = None
+        for candidate in candidates:
+            if candidate.is_class:
+                class_count += 1
+                if first_class is None:
+                    first_class = candidate
+            if not candidate.is_template:
+                no_template_count += 1
+                if shortest_no_template is None or len(candidate.name) < len(shortest_no_template.name):
+                    shortest_no_template = candidate
 
-        # If there is only one by here we return it.
-        if len(classes) == 1:
-            return classes[0]
+        # Often this is due to the symbol matching the name of the constructor as well as the class name itself
+        # We will prefer the class if there is only one
+        if class_count == 1:
+            return first_class  # type: ignore
 
         # Now, to disambiguate between ``PolyVox::Array< 1, ElementType >::operator[]`` and ``PolyVox::Array::operator[]`` matching ``operator[]``,
-        # we will ignore templated (as in C++ templates) tag names by removing names containing ``<``
-        no_templates = [c for c in candidates if not c.is_template]
-
-        if len(no_templates) == 1:
-            return no_templates[0]
-
-        # If not found by now, return the shortest match, assuming that's the most specific
-        if no_templates:
-            # TODO return a warning here?
-            return min(no_templates, key=lambda entry: len(entry.name))
+        # we will ignore templated (as in C++ templates) tag names, i.e. names containing ``<``.
+        # If not found by now, return the shortest of those, assuming that's the most specific
+        if no_template_count:
+            # TODO return a warning here if no_template_count > 1?
+            return shortest_no_template  # type: ignore
 
         # TODO Offer fuzzy suggestion
         raise LookupError('Could not find a match')
@@ -221,36 +328,71 @@ class SymbolMap:
 
         # Restrict to functions when given an argument list
         kind = 'function' if normalised_arglist else None
+
+        # An exact match always wins, see _disambiguate
+        for entry in self._by_name.get(symbol, ()):
+            if entry.matches(symbol, kind, normalised_arglist) and not entry.has_unparsable_arglist:
+                return entry
+
         candidates = self._find_entries(symbol, kind, normalised_arglist)
         return self._disambiguate(symbol, candidates)
 
 
-def parse_tag_file(doc: ET.ElementTree) -> List[Entry]:
+def _iter_compound_elements(source: TagFileSource) -> Iterator[ET.Element]:
     """
-    Takes in an XML tree from a Doxygen tag file and returns a list that looks something like:
+    Yields the top-level ``<compound>`` elements of a Doxygen tag file.
 
-    .. code-block:: python
+    Paths and file objects are parsed incrementally and every compound is
+    dropped once the caller is done with it, so that the whole document is
+    never held in memory.
+    """
 
-        [Entry('PolyVox', ...),
-         Entry('PolyVox::Array', ...),
-         Entry('PolyVox::Array1DDouble'),
-         Entry('PolyVox::Array1DFloat'),
-         Entry('PolyVox::Array1DInt16'),
-         Entry('QScriptContext::throwError'),
-         Entry('QScriptContext::toString'),
-        ]
+    if hasattr(source, 'findall'):
+        # Already parsed, compounds are children of the root element
+        root = source.getroot() if hasattr(source, 'getroot') else source  # type: ignore
+        for element in root:
+            if element.tag == 'compound':  # type: ignore
+                yield element
+        return
 
-    :Parameters:
-        doc : xml.etree.ElementTree
-            The XML DOM object
+    if HAVE_LXML:
+        # lxml filters on the tag itself and knows the parent of each element.
+        # Like expat, don't expand external entities: tag files may come from remote servers
+        for _, element in ET.iterparse(source, events=('end',), tag='compound', resolve_entities=False):
+            root = element.getparent()
+            if root is None or root.getparent() is not None:
+                continue
+            yield element
+            # The parser may already be ahead of us, so only drop what we are done with
+            element.clear()
+            while element.getprevious() is not None:
+                del root[0]
+        return
 
-    :return: a list of entries mapping fully qualified symbols to files
+    root = None
+    depth = 0
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1 and element.tag == 'compound':
+            yield element
+            root.clear()  # type: ignore
+
+
+def _iter_compounds(source: TagFileSource) -> Iterator[Tuple[str, str, str, ET.Element]]:
+    """
+    Yields ``(kind, name, filename, element)`` for the compounds of a Doxygen
+    tag file that are turned into entries, skipping all other kinds.
     """
 
-    entries: List[Entry] = []
-    for compound in doc.findall('./compound'):
+    for compound in _iter_compound_elements(source):
         compound_kind = compound.get('kind')
-        if compound_kind not in {'namespace', 'class', 'struct', 'file', 'define', 'group', 'page'}:
+        if compound_kind not in _COMPOUND_KINDS:
             continue
 
         compound_name = compound.findtext('name')
@@ -267,45 +409,160 @@ def parse_tag_file(doc: ET.ElementTree) -> List[Entry]:
         if compound_kind in ('file', 'page') and not os.path.splitext(compound_filename)[1]:
             compound_filename = compound_filename + '.html'
 
+        yield sys.intern(compound_kind), compound_name, compound_filename, compound
+
+
+def parse_tag_file(source: TagFileSource) -> List[Entry]:
+    """
+    Takes in a Doxygen tag file and returns a list that looks something like:
+
+    .. code-block:: python
+
+        [Entry('PolyVox', ...),
+         Entry('PolyVox::Array', ...),
+         Entry('PolyVox::Array1DDouble'),
+         Entry('PolyVox::Array1DFloat'),
+         Entry('PolyVox::Array1DInt16'),
+         Entry('QScriptContext::throwError'),
+         Entry('QScriptContext::toString'),
+        ]
+
+    :Parameters:
+        source : str, file object or xml.etree.ElementTree
+            The path to the tag file, an open binary file or an already parsed XML DOM object
+
+    :return: a list of entries mapping fully qualified symbols to files
+    """
+
+    # Names, kinds and argument lists repeat a lot across entries (overloads,
+    # common signatures like ``()``) so they are interned to share storage.
+    # Argument lists are normalised lazily, see normalise_arglist.
+    entries: List[Entry] = []
+    # Bind everything used per member to locals, instead of looking it up many times
+    add_entry = entries.append
+    intern = sys.intern
+    nonfunction_member_kinds = _NONFUNCTION_MEMBER_KINDS
+    for compound_kind, compound_name, compound_filename, compound in _iter_compounds(source):
         # If it's a compound we can simply add it
-        entries.append(Entry(compound_name, kind=compound_kind, file=compound_filename, arglist=None))
+        add_entry(Entry(compound_name, kind=compound_kind, file=compound_filename, arglist=None))
+
+        for member in compound:
+            if member.tag != 'member':
+                continue
+
+            # Read all the children at once rather than searching for each of them in turn.
+            # Like findtext, an empty element gives '' and a missing one gives None.
+            children = {child.tag: child.text or '' for child in member}
 
-        for member in compound.findall('member'):
             # If the member doesn't have an <anchorfile> element, use the parent compounds <filename> instead
             # This is the way it is in the qt.tag and is perhaps an artefact of old Doxygen
-            anchorfile = member.findtext('anchorfile') or compound_filename
-            member_name = member.findtext('name')
+            anchorfile = children.get('anchorfile') or compound_filename
+            member_name = children.get('name')
             if member_name is None:
                 raise KeyError(f"Member of {compound_name} does not have a name")
-            member_symbol = compound_name + '::' + member_name
+            member_symbol = intern(compound_name + '::' + member_name)
             member_kind = member.get('kind')
-            arglist = member.findtext('./arglist')  # If it has an <arglist> then we assume it's a function. Empty <arglist> returns '', not None. Things like typedefs and enums can have empty arglists
-
-            member_file = join(anchorfile, '#', member.findtext('anchor'))
-
-            if arglist and member_kind not in {'variable', 'typedef', 'enumeration', 'enumvalue'}:
-                try:
-                    # Parse arguments to do overload resolution later
-                    normalised_arglist = normalise(member_symbol + arglist)[1]
-                    entries.append(
-                        Entry(name=member_symbol, kind=member_kind, file=member_file, arglist=normalised_arglist))
-                except ParseException as e:
-                    print(f'Skipping {member_kind} {member_symbol}{arglist}. Error reported from parser was: {e}')
+            if member_kind is not None:
+                member_kind = intern(member_kind)
+            arglist = children.get('arglist')  # If it has an <arglist> then we assume it's a function. Empty <arglist> returns '', not None. Things like typedefs and enums can have empty arglists
+
+            member_file = f"{anchorfile}#{children.get('anchor', '')}"
+
+            if arglist and member_kind not in nonfunction_member_kinds:
+                # Keep the arguments to do overload resolution later
+                add_entry(Entry(name=member_symbol, kind=member_kind, file=member_file, arglist=intern(arglist)))
             else:
                 # Put the simple things directly into the list
-                entries.append(Entry(name=member_symbol, kind=member_kind, file=member_file, arglist=None))
+                add_entry(Entry(name=member_symbol, kind=member_kind, file=member_file, arglist=None))
 
     return entries
 
 
-def join(*args):
-    return ''.join(args)
+def tag_file_fingerprint(path: str) -> Tuple[int, bytes]:
+    '''
+    Computes a fingerprint of the contents of a local tag file. This tells
+    whether a tag file with a newer modification time actually changed, as
+    happens e.g. after a fresh checkout.
+
+    Args:
+        path (str): Path to the tag file
+
+    Returns:
+        tuple: the size of the file and its BLAKE2b digest
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as tag_file:
+        for chunk in iter(functools.partial(tag_file.read, 1 << 20), b''):
+            digest.update(chunk)
+    return os.path.getsize(path), digest.digest()
+
+
+def is_current_cache(sub_cache: dict) -> bool:
+    '''
+    Checks whether a sub-cache was written by this version of doxylink, with the current cache schema.
+
+    Args:
+        sub_cache (dict): The sub-cache, holding the mapping, mtime, fingerprint, version and schema
+    '''
+    return sub_cache.get('version') == __version__ and sub_cache.get('schema') == CACHE_SCHEMA
+
+
+def read_cache_file(app, path: str, modification_time: float,
+                    fingerprint: Optional[Callable[[], Optional[Tuple[int, bytes]]]] = None) -> Optional[dict]:
+    '''
+    Reads a sub-cache previously written by `write_cache_file`. If the tag file
+    was only touched, the new modification time is written back to the cache
+    file so that the tag file doesn't need to be fingerprinted again.
+
+    Args:
+        app: Sphinx' application instance
+        path (str): Path to the cache file
+        modification_time (float): Modification time of the tag file the cache was built from
+        fingerprint (Optional[callable]): Returns the fingerprint of the tag file, see `tag_file_fingerprint`.
+            It is only called for a cache older than the tag file, which is still used if its fingerprint matches.
+
+    Returns:
+        dict: the sub-cache, or None if the file is missing, unreadable, written by another version or out of date
+    '''
+    try:
+        with open(path, 'rb') as cache_file:
+            sub_cache = pickle.load(cache_file)
+    except Exception:
+        # Whatever went wrong, the cache can't be used and will be rebuilt
+        return None
+
+    if not isinstance(sub_cache, dict) or not is_current_cache(sub_cache):
+        return None
+    if sub_cache.get('mtime', 0) < modification_time:
+        current_fingerprint = fingerprint() if fingerprint is not None else None
+        if current_fingerprint is None or sub_cache.get('fingerprint') != current_fingerprint:
+            return None
+        sub_cache['mtime'] = modification_time
+        write_cache_file(app, path, sub_cache)
+    return sub_cache
+
+
+def write_cache_file(app, path: str, sub_cache: dict) -> None:
+    '''
+    Writes a sub-cache to disk for use in later builds.
+
+    Args:
+        app: Sphinx' application instance
+        path (str): Path to the cache file
+        sub_cache (dict): The sub-cache, holding the mapping, mtime, fingerprint, version and schema
+    '''
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as cache_file:
+            pickle.dump(sub_cache, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as error:
+        report_info(app.env, 'Could not write tag file cache %s: %s' % (path, error))
 
 
 def create_role(app, tag_filename, rootdir, cache_name, pdf=""):
     # Tidy up the root directory path
     if not rootdir.endswith(('/', '\\')):
-        rootdir = join(rootdir, os.sep)
+        rootdir = rootdir + os.sep
 
     try:
         if is_url(tag_filename):
@@ -316,37 +573,64 @@ def create_role(app, tag_filename, rootdir, cache_name, pdf=""):
                 modification_time = parsedate(hresponse.headers['last-modified']).timestamp()
             except KeyError:  # no last-modified header from server
                 modification_time = time.time()
-            def _parse():
-                response = requests.get(tag_filename, allow_redirects=True)
-                if response.status_code != 200:
-                    raise FileNotFoundError
-                return ET.fromstring(response.text)
+            def _build_mapping():
+                with requests.get(tag_filename, allow_redirects=True, stream=True) as response:
+                    if response.status_code != 200:
+                        raise FileNotFoundError
+                    # Stream the download into the parser instead of holding the whole document
+                    response.raw.decode_content = True
+                    return SymbolMap(response.raw)
+            def _fingerprint():
+                # Not worth downloading the file for
+                return None
         else:
             modification_time = os.path.getmtime(tag_filename)
-            def _parse():
-                return ET.parse(tag_filename)
+            def _build_mapping():
+                # SymbolMap streams the file, no XML tree outlives it
+                return SymbolMap(tag_filename)
+            @functools.lru_cache(maxsize=None)
+            def _fingerprint():
+                return tag_file_fingerprint(tag_filename)
+
+        # The sub-cache is also kept next to the doctrees so that it survives
+        # the Sphinx environment being thrown away
+        cache_path = os.path.join(app.doctreedir, f'doxylink-{cache_name}.pkl')
+
+        def _rebuild():
+            sub_cache = read_cache_file(app, cache_path, modification_time, _fingerprint)
+            if sub_cache is not None:
+                report_info(app.env, 'Loaded sub-cache from %s' % cache_path)
+                return sub_cache
+            sub_cache = {'mapping': _build_mapping(), 'mtime': modification_time, 'fingerprint': _fingerprint(),
+                         'version': __version__, 'schema': CACHE_SCHEMA}
+            write_cache_file(app, cache_path, sub_cache)
+            return sub_cache
 
         report_info(app.env, bold('Checking tag file cache for %s: ' % cache_name))
         if not hasattr(app.env, 'doxylink_cache'):
             # no cache present at all, initialise it
             report_info(app.env, 'No cache at all, rebuilding...')
-            mapping = SymbolMap(_parse())
-            app.env.doxylink_cache = {cache_name: {'mapping': mapping, 'mtime': modification_time, 'version': __version__}}
+            app.env.doxylink_cache = {cache_name: _rebuild()}
         elif not app.env.doxylink_cache.get(cache_name):
             # Main cache is there but the specific sub-cache for this tag file is not
             report_info(app.env, 'Sub cache is missing, rebuilding...')
-            mapping = SymbolMap(_parse())
-            app.env.doxylink_cache[cache_name] = {'mapping': mapping, 'mtime': modification_time, 'version': __version__}
+            app.env.doxylink_cache[cache_name] = _rebuild()
         elif app.env.doxylink_cache[cache_name]['mtime'] < modification_time:
             # tag file has been modified since sub-cache creation
-            report_info(app.env, 'Sub-cache is out of date, rebuilding...')
-            mapping = SymbolMap(_parse())
-            app.env.doxylink_cache[cache_name] = {'mapping': mapping, 'mtime': modification_time}
-        elif not app.env.doxylink_cache[cache_name].get('version') or app.env.doxylink_cache[cache_name].get('version') != __version__:
-            # sub-cache doesn't have a version or the version doesn't match
+            sub_cache = app.env.doxylink_cache[cache_name]
+            if (_fingerprint() is not None and sub_cache.get('fingerprint') == _fingerprint()
+                    and is_current_cache(sub_cache)):
+                # ...but its contents are the same
+                report_info(app.env, 'Tag file is unchanged, sub-cache is up-to-date')
+                sub_cache['mtime'] = modification_time
+                write_cache_file(app, cache_path, sub_cache)
+            else:
+                report_info(app.env, 'Sub-cache is out of date, rebuilding...')
+                app.env.doxylink_cache[cache_name] = _rebuild()
+        elif not is_current_cache(app.env.doxylink_cache[cache_name]):
+            # sub-cache doesn't have a version or schema, or one of them doesn't match
             report_info(app.env, 'Sub-cache schema version doesn\'t match, rebuilding...')
-            mapping = SymbolMap(_parse())
-            app.env.doxylink_cache[cache_name] = {'mapping': mapping, 'mtime': modification_time, 'version': __version__}
+            app.env.doxylink_cache[cache_name] = _rebuild()
         else:
             # The cache is up to date
             report_info(app.env, 'Sub-cache is up-to-date')
@@ -356,13 +640,20 @@ def create_role(app, tag_filename, rootdir, cache_name, pdf=""):
     else:
         tag_file_found = True
 
+    # If it's an absolute path then the link will work regardless of the document directory
+    # Also check if it is a URL (i.e. it has a 'scheme' like 'http' or 'file')
+    rootdir_is_absolute = os.path.isabs(rootdir) or bool(urllib.parse.urlparse(rootdir).scheme)
+
+    @functools.lru_cache(maxsize=1024)
+    def relative_path_to_docsrc(document_dir):
+        return os.path.relpath(app.env.srcdir, document_dir)
+
     def find_doxygen_link(name, rawtext, text, lineno, inliner, options={}, content=[]):
         # from :name:`title <part>`
         has_explicit_title, title, part = split_explicit_title(text)
         part = utils.unescape(part)
-        warning_messages = []
         if not tag_file_found:
-            warning_messages.append('Could not find match for `%s` because tag file not found' % part)
+            # The missing tag file was reported once when the role was created
             return [nodes.inline(title, title)], []
 
         try:
@@ -377,20 +668,19 @@ def create_role(app, tag_filename, rootdir, cache_name, pdf=""):
             return [nodes.inline(title, title)], []
 
         if pdf and app.builder.format == 'latex':
-            full_url = join(pdf, '#', url.file)
+            full_url = f'{pdf}#{url.file}'
             full_url = full_url.replace('.html#', '_')  # for links to variables and functions
             full_url = full_url.replace('.html', '')  # for links to files
-        # If it's an absolute path then the link will work regardless of the document directory
-        # Also check if it is a URL (i.e. it has a 'scheme' like 'http' or 'file')
-        elif os.path.isabs(rootdir) or urllib.parse.urlparse(rootdir).scheme:
-            full_url = join(rootdir, url.file)
+        elif rootdir_is_absolute:
+            full_url = rootdir + url.file
         # But otherwise we need to add the relative path of the current document to the root source directory to the link
         else:
-            relative_path_to_docsrc = os.path.relpath(app.env.srcdir, os.path.dirname(inliner.document.attributes['source']))
-            full_url = join(relative_path_to_docsrc, '/', rootdir, url.file)  # We always use the '/' here rather than os.sep since this is a web link avoids problems like documentation/.\../library/doc/ (mixed slashes)
+            document_dir = os.path.dirname(inliner.document.attributes['source'])
+            full_url = f'{relative_path_to_docsrc(document_dir)}/{rootdir}{url.file}'  # We always use the '/' here rather than os.sep since this is a web link avoids problems like documentation/.\../library/doc/ (mixed slashes)
 
-        if url.kind == 'function' and app.config.add_function_parentheses and normalise(title)[1] == '' and not has_explicit_title:
-            title = join(title, '()')
+        # Without an explicit title, title is usually the symbol that was just looked up so normalise hits its cache
+        if url.kind == 'function' and app.config.add_function_parentheses and not has_explicit_title and normalise(title)[1] == '':
+            title = title + '()'
 
         pnode = nodes.reference(title, title, internal=False, refuri=full_url)
         return [pnode], []
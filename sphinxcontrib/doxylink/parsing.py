@@ -1,3 +1,4 @@
+import functools
 from typing import Tuple
 
 from pyparsing import Word, Literal, nums, alphanums, OneOrMore, Opt,\
@@ -66,9 +67,11 @@ argument = Group(argument_type('argument_type') + Opt(input_name) + Opt(default_
 arglist = LPAR + delimitedList(argument)('arg_list') + Opt(COMMA + '...')('var_args') + RPAR
 
 
+@functools.lru_cache(maxsize=65536)
 def normalise(symbol: str) -> Tuple[str, str]:
     """
     Takes a c++ symbol or function and splits it into symbol and a normalised argument list.
+    Results are memoised since documents tend to reference the same symbols many times.
 
     :Parameters:
         symbol : string
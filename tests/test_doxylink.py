@@ -9,7 +9,7 @@ from unittest.mock import MagicMock
 import pytest
 from testfixtures import LogCapture
 
-from sphinxcontrib.doxylink import doxylink
+from sphinxcontrib.doxylink import __version__, doxylink
 
 
 @pytest.fixture
@@ -55,6 +55,7 @@ def examples_tag_file():
     ('my_lib.h::my_func', 'my__lib_8h.html'),
     ('my_namespace', 'namespacemy__namespace.html'),
     ('my_namespace::MyClass', 'classmy__namespace_1_1MyClass.html'),
+    ('MyClass', 'classMyClass.html'),
     ('my_lib.h::MY_MACRO', 'my__lib_8h.html'),
     ('my_namespace::MyClass::my_method', 'classmy__namespace_1_1MyClass.html'),
     ('ClassesGroup', 'group__ClassesGroup.html'),
@@ -107,6 +108,57 @@ def test_parse_tag_file(examples_tag_file):
     assert has_entry('ClassesGroup')
 
 
+@pytest.fixture(params=['xml.etree', 'lxml'])
+def xml_parser(request, monkeypatch):
+    """
+    Makes doxylink use each of the XML parsers it supports in turn
+    """
+    if request.param == 'lxml':
+        etree = pytest.importorskip('lxml.etree')
+        monkeypatch.setattr(doxylink, 'ET', etree)
+        monkeypatch.setattr(doxylink, 'HAVE_LXML', True)
+    else:
+        monkeypatch.setattr(doxylink, 'ET', ET)
+        monkeypatch.setattr(doxylink, 'HAVE_LXML', False)
+    return request.param
+
+
+def test_parse_tag_file_streaming(examples_tag_file, xml_parser):
+    from_tree = doxylink.parse_tag_file(ET.parse(examples_tag_file))
+    from_path = doxylink.parse_tag_file(examples_tag_file)
+    with open(examples_tag_file, 'rb') as tag_file:
+        from_file = doxylink.parse_tag_file(tag_file)
+
+    assert from_tree
+    assert from_path == from_tree
+    assert from_file == from_tree
+
+
+EXTERNAL_ENTITY_TAG_FILE = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<!DOCTYPE tagfile [<!ENTITY secret SYSTEM "file://{path}">]>
+<tagfile>
+  <compound kind="namespace">
+    <name>ns&secret;</name>
+    <filename>namespacens.html</filename>
+  </compound>
+</tagfile>
+"""
+
+
+def test_parse_tag_file_no_external_entities(tmp_path, xml_parser):
+    secret = tmp_path / 'secret.txt'
+    secret.write_text('SECRET')
+    tag_file = tmp_path / 'entity.tag'
+    tag_file.write_text(EXTERNAL_ENTITY_TAG_FILE.format(path=secret))
+
+    try:
+        names = [entry.name for entry in doxylink.parse_tag_file(str(tag_file))]
+    except SyntaxError:
+        # Refusing the entity altogether is fine too
+        return
+    assert not any('SECRET' in name for name in names)
+
+
 @pytest.mark.parametrize('symbol, expected_matches', [
     ('my_namespace', {'my_namespace'}),
     ('my_namespace::MyClass', {'my_namespace::MyClass'}),
@@ -130,6 +182,93 @@ def test_find_url_piecewise(examples_tag_file, symbol, expected_matches):
     assert set(matches).issubset(set(mapping._entries))
 
 
+def test_cache_file(examples_tag_file, tmp_path):
+    app = MagicMock()
+    path = str(tmp_path / 'doctrees' / 'doxylink-test.pkl')
+    mapping = doxylink.SymbolMap(examples_tag_file)
+
+    assert doxylink.read_cache_file(app, path, 10.0) is None
+
+    doxylink.write_cache_file(app, path, {'mapping': mapping, 'mtime': 10.0, 'version': __version__,
+                                          'schema': doxylink.CACHE_SCHEMA})
+    sub_cache = doxylink.read_cache_file(app, path, 10.0)
+    assert sub_cache is not None
+    assert sub_cache['mapping']['my_namespace::MyClass'] == mapping['my_namespace::MyClass']
+
+    # The tag file is newer than the cache
+    assert doxylink.read_cache_file(app, path, 20.0) is None
+
+    doxylink.write_cache_file(app, path, {'mapping': mapping, 'mtime': 10.0, 'version': 'old',
+                                          'schema': doxylink.CACHE_SCHEMA})
+    assert doxylink.read_cache_file(app, path, 10.0) is None
+
+    # Written by older code with the same version but a different structure
+    doxylink.write_cache_file(app, path, {'mapping': mapping, 'mtime': 10.0, 'version': __version__})
+    assert doxylink.read_cache_file(app, path, 10.0) is None
+
+
+def test_cache_file_fingerprint(examples_tag_file, tmp_path):
+    app = MagicMock()
+    path = str(tmp_path / 'doxylink-test.pkl')
+    fingerprint = doxylink.tag_file_fingerprint(examples_tag_file)
+    doxylink.write_cache_file(app, path, {'mapping': doxylink.SymbolMap(examples_tag_file), 'mtime': 10.0,
+                                          'fingerprint': fingerprint, 'version': __version__,
+                                          'schema': doxylink.CACHE_SCHEMA})
+
+    def no_fingerprint():
+        raise AssertionError('fingerprint computed for an up-to-date cache')
+
+    # The fingerprint isn't needed when the cache is recent enough
+    assert doxylink.read_cache_file(app, path, 10.0, no_fingerprint) is not None
+
+    # The tag file is newer than the cache but has the same contents
+    sub_cache = doxylink.read_cache_file(app, path, 20.0, lambda: fingerprint)
+    assert sub_cache is not None
+    assert sub_cache['mtime'] == 20.0
+
+    # ...and the new mtime was saved, so the next read doesn't need the fingerprint
+    assert doxylink.read_cache_file(app, path, 20.0, no_fingerprint) is not None
+
+    changed = tmp_path / 'changed.tag'
+    with open(examples_tag_file, 'rb') as tag_file:
+        changed.write_bytes(tag_file.read().replace(b'MyClass', b'MyKlass'))
+    assert doxylink.read_cache_file(app, path, 30.0, lambda: doxylink.tag_file_fingerprint(str(changed))) is None
+
+
+@pytest.mark.parametrize('arglist, reference_arglist, expected', [
+    ('(int foo)', '(int)', True),
+    ('(int foo)', '(float)', False),
+    ('(const std::string &a, int b=0) const', '(const std::string&, int) const', True),
+    ('("center")', '(int)', False),
+    ('("center")', None, True),
+])
+def test_entry_matches_arglist(arglist, reference_arglist, expected):
+    entry = doxylink.Entry('ns::foo', 'function', 'file.html#anchor', arglist)
+
+    assert entry.matches('foo', 'function', reference_arglist) == expected
+
+
+def test_normalise_arglist_warns_once():
+    doxylink.normalise_arglist.cache_clear()
+    with LogCapture() as l:
+        assert doxylink.normalise_arglist('ns::bar', '("center")') is None
+        assert doxylink.normalise_arglist('ns::bar', '("center")') is None
+    assert [record.levelname for record in l.records] == ['WARNING']
+
+
+@pytest.mark.parametrize('names_and_kinds, expected', [
+    ([('A::foo', 'class'), ('A::foo::foo', 'function')], 'A::foo'),
+    ([('A< T >::foo', 'function'), ('B::foo', 'function')], 'B::foo'),
+    ([('A::B::foo', 'function'), ('C::foo', 'function'), ('D::foo', 'function')], 'C::foo'),
+    ([('A::foo', 'class'), ('B::foo', 'class'), ('C::D::foo', 'function')], 'A::foo'),
+])
+def test_disambiguate(names_and_kinds, expected):
+    mapping = doxylink.SymbolMap(ET.fromstring('<tagfile/>'))
+    candidates = [doxylink.Entry(name, kind, 'file.html', None) for name, kind in names_and_kinds]
+
+    assert mapping._disambiguate('foo', candidates).name == expected
+
+
 @pytest.mark.parametrize('str_to_validate, expected', [
     ('http://example.com', True),
     ('https://example.com/sub', True),
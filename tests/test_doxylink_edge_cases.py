@@ -1,4 +1,7 @@
 import xml.etree.ElementTree as ET
+
+import pytest
+
 from sphinxcontrib.doxylink import doxylink
 
 TEMPLATE_CLASS_WITH_SELF_FRIEND = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
@@ -45,3 +48,57 @@ def test_doxylink_wont_crash_on_self_friend_template_classes():
     except RuntimeError as exc:
         assert False, f"template class with self friend definition raises a Runtime Error: {exc}"
 
+
+
+UNPARSABLE_ARGLISTS = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<tagfile doxygen_version="1.9.4">
+  <compound kind="class">
+    <name>T&lt; 1 &gt;</name>
+    <filename>class_t_3_011_01_4.html</filename>
+    <member kind="function">
+      <type>int</type>
+      <name>get</name>
+      <anchorfile>class_t_3_011_01_4.html</anchorfile>
+      <anchor>a1</anchor>
+      <arglist>()</arglist>
+    </member>
+  </compound>
+  <compound kind="class">
+    <name>A</name>
+    <filename>class_a.html</filename>
+    <member kind="function">
+      <type>int</type>
+      <name>get</name>
+      <anchorfile>class_a.html</anchorfile>
+      <anchor>a2</anchor>
+      <arglist>("center")</arglist>
+    </member>
+    <member kind="function">
+      <type>int</type>
+      <name>put</name>
+      <anchorfile>class_a.html</anchorfile>
+      <anchor>a3</anchor>
+      <arglist>("center")</arglist>
+    </member>
+    <member kind="function">
+      <type>int</type>
+      <name>put</name>
+      <anchorfile>class_a.html</anchorfile>
+      <anchor>a4</anchor>
+      <arglist>(int)</arglist>
+    </member>
+  </compound>
+</tagfile>
+"""
+
+@pytest.mark.parametrize('symbol, file', [
+    # Functions that can't be parsed don't take precedence over those that can
+    ('get', 'class_t_3_011_01_4.html#a1'),
+    ('A::put', 'class_a.html#a4'),
+    # But they can still be found by name
+    ('A::get', 'class_a.html#a2'),
+])
+def test_doxylink_unparsable_arglist_is_last_resort(symbol, file):
+    mapping = doxylink.SymbolMap(ET.ElementTree(ET.fromstring(UNPARSABLE_ARGLISTS)))
+
+    assert mapping[symbol].file == file